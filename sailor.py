@@ -109,10 +109,24 @@ class View(object):
   Sailor users don't instantiate views. Instead, they instantiate controls,
   which render themselves Views to represent their current physical appearance.
   """
+  _color_app = None
+  _color_pair = 0
+
   def size(self, rect):
     """Return the size that the view takes up."""
     return (0, 0)
 
+  def cached_size(self, rect):
+    """Return size(rect), memoized for the duration of the current frame."""
+    # Key on the view itself rather than id(), so the cache keeps it alive
+    cache = rect.app._size_cache
+    key = (self,) + rect.as_tuple()
+    try:
+      return cache[key]
+    except KeyError:
+      size = cache[key] = self.size(rect)
+      return size
+
   def display(self, rect):
     """Render the view inside the given rectangle."""
     self.rect = rect
@@ -123,14 +137,22 @@ class View(object):
     """Overridden by subclasses to do the actual rendering."""
     raise RuntimeError('Not implemented: disp()')
 
+  def color_pair(self, rect):
+    """Return the curses attribute for the view's fg/bg colors.
+
+    The color pair is looked up once per App and remembered on the view,
+    which stays valid because an App never reassigns its color pairs.
+    """
+    if self._color_app is not rect.app:
+      self._color_pair = curses.color_pair(rect.get_color(self.fg, self.bg))
+      self._color_app = rect.app
+    return self._color_pair
+
 
 class Display(View):
   """A view that displays literal characters."""
   def __init__(self, text, min_width=0, fg=white, bg=black, attr=0):
-    if isinstance(text, list):
-      self.lines = text
-    else:
-      self.lines = str(text).split('\n')
+    self.text = text
     self.fg = fg
     self.bg = bg
     self.min_width = min_width
@@ -140,20 +162,24 @@ class Display(View):
   def text(self):
     return '\n'.join(self.lines)
 
+  @text.setter
+  def text(self, text):
+    if isinstance(text, list):
+      self.lines = text
+    else:
+      self.lines = str(text).split('\n')
+
   def size(self, rect):
     return max(self.min_width, max(len(l) for l in self.lines)), len(self.lines)
 
   def disp(self, rect):
-    col = rect.get_color(self.fg, self.bg)
     print_width = max(0, rect.w)
     lines = self.lines[:rect.h]
     if print_width > 0 and lines:
+      attr = self.color_pair(rect) | self.attr
       for i, line in enumerate(lines):
         padding = ' ' * min(print_width, self.min_width - len(line))
-        try:
-          rect.screen.addstr(rect.y + i, rect.x, line[:print_width] + padding, curses.color_pair(col) | self.attr)
-        except curses.error, e:
-          logger.warn(str(e))
+        rect.app.queue_text(rect.y + i, rect.x, line[:print_width] + padding, attr)
 
 
 class Positioned(View):
@@ -164,10 +190,10 @@ class Positioned(View):
     self.y = y
 
   def size(self, rect):
-    return self.inner.size(rect)
+    return self.inner.cached_size(rect)
 
   def disp(self, rect):
-    size = self.size(rect)
+    size = self.cached_size(rect)
 
     x = max(0, min(self.x, rect.w - size[0]))
     irect = Rect(rect.app, rect.screen, x, self.y, size[0], size[1])
@@ -184,7 +210,7 @@ class Centered(View):
     return rect
 
   def disp(self, rect):
-    size = self.inner.size(rect)
+    size = self.inner.cached_size(rect)
     x = (rect.w - size[0]) / 2
     y = (rect.h - size[1]) / 2
     irect = rect.sub_rect(x, y, size[0], size[1])
@@ -202,7 +228,7 @@ class AlignRight(View):
     return rect.w, rect.h
 
   def disp(self, rect):
-    w, h = self.inner.size(rect)
+    w, h = self.inner.cached_size(rect)
     irect = rect.adj_rect(rect.w - w - self.h_margin, self.v_margin)
     self.inner.display(irect)
 
@@ -218,44 +244,57 @@ class HFill(View):
     return rect.w, 1
 
   def disp(self, rect):
-    col = rect.get_color(self.fg, self.bg)
-    rect.screen.addstr(rect.y, rect.x, self.char * rect.w, curses.color_pair(col))
+    rect.app.queue_text(rect.y, rect.x, self.char * rect.w, self.color_pair(rect))
 
 
 class Horizontal(View):
   """A view that lays out other views horizontally."""
+  _sizes_key = None
+
   def __init__(self, views, margin=0):
     assert(all(views))
     self.views = views
     self.margin = margin
 
-  def size(self, rect):
-    sizes = []
-    for v in self.views:
-      sizes.append(v.size(rect))
-      rect = rect.adj_rect(sizes[-1][0], 0)
+  def _child_sizes(self, rect):
+    """Return the sizes of the views laid out from rect, once per frame."""
+    key = (rect.app._frame_generation,) + rect.as_tuple()
+    if self._sizes_key != key:
+      self._sizes = []
+      for v in self.views:
+        self._sizes.append(v.cached_size(rect))
+        rect = rect.adj_rect(self._sizes[-1][0], 0)
+      self._sizes_key = key
+    return self._sizes
 
+  def size(self, rect):
+    sizes = self._child_sizes(rect)
     widths = [s[0] for s in sizes]
     heights = [s[1] for s in sizes]
     return sum(widths) + max(len(self.views) - 1, 0) * self.margin, max(heights + [0])
 
   def disp(self, rect):
-    for v in self.views:
+    for v, size in zip(self.views, self._child_sizes(rect)):
       v.display(rect)
-      dx = v.size(rect)[0] + self.margin
-      rect = rect.adj_rect(dx, 0)
+      rect = rect.adj_rect(size[0] + self.margin, 0)
 
 
 class Grid(View):
   """A view that lays out other views in a grid."""
+  _cache_gen = -1
+  _cached_rect = None
+
   def __init__(self, grid, h_margin=1, align_right=False):
     self.grid = grid
     self.h_margin = h_margin
     self.align_right = align_right
 
   def size(self, rect):
+    if self._cache_gen == rect.app._frame_generation and self._cached_rect == rect.as_tuple():
+      return self._cached_size
+
     # FIXME: Not correct for size-adapting controls
-    self.size_grid = [[col.size(rect) for col in row]
+    self.size_grid = [[col.cached_size(rect) for col in row]
                       for row in self.grid]
     cols = len(self.size_grid[0])
     self.col_widths = [max(self.size_grid[i][col_nr][0] for i in range(len(self.size_grid)))
@@ -264,14 +303,19 @@ class Grid(View):
                         for row in self.size_grid]
     w = sum(self.col_widths) + (len(self.col_widths) - 1) * self.h_margin
     h = sum(self.row_heights)
+
+    self._cache_gen = rect.app._frame_generation
+    self._cached_rect = rect.as_tuple()
+    self._cached_size = w, h
     return w, h
 
   def disp(self, rect):
+    self.size(rect)  # Make sure the layout is from this frame
     for j, row in enumerate(self.grid):
       rrect = rect.adj_rect(0, sum(self.row_heights[:j]))
       for i, cell in enumerate(row):
         col_width = self.col_widths[i]
-        cell_size = cell.size(rect)
+        cell_size = self.size_grid[j][i]
         if self.align_right:
           rrect = rrect.adj_rect(col_width - cell_size[0], 0)
         cell.display(rrect)
@@ -280,25 +324,33 @@ class Grid(View):
 
 class Vertical(View):
   """A view that lays out other views vertically."""
+  _sizes_key = None
+
   def __init__(self, views, margin=0):
     self.views = views
     self.margin = margin
 
-  def size(self, rect):
-    sizes = []
-    for v in self.views:
-      sizes.append(v.size(rect))
-      rect = rect.adj_rect(0, sizes[-1][1])
+  def _child_sizes(self, rect):
+    """Return the sizes of the views laid out from rect, once per frame."""
+    key = (rect.app._frame_generation,) + rect.as_tuple()
+    if self._sizes_key != key:
+      self._sizes = []
+      for v in self.views:
+        self._sizes.append(v.cached_size(rect))
+        rect = rect.adj_rect(0, self._sizes[-1][1])
+      self._sizes_key = key
+    return self._sizes
 
+  def size(self, rect):
+    sizes = self._child_sizes(rect)
     widths = [s[0] for s in sizes]
     heights = [s[1] for s in sizes]
     return max(widths + [0]), sum(heights) + max(len(self.views) - 1, 0) * self.margin
 
   def disp(self, rect):
-    for v in self.views:
+    for v, size in zip(self.views, self._child_sizes(rect)):
       v.display(rect)
-      dy = v.size(rect)[1] + self.margin
-      rect = rect.adj_rect(0, dy)
+      rect = rect.adj_rect(0, size[1] + self.margin)
 
 
 class Box(View):
@@ -314,13 +366,13 @@ class Box(View):
 
   def size(self, rect):
     if not self.x_fill or not self.y_fill:
-      inner_size = self.inner.size(rect.adj_rect(1 + self.x_margin, 1 + self.y_margin, 1 + self.x_margin, 1 + self.y_margin))
+      inner_size = self.inner.cached_size(rect.adj_rect(1 + self.x_margin, 1 + self.y_margin, 1 + self.x_margin, 1 + self.y_margin))
     w = rect.w if self.x_fill else inner_size[0] + 2 * (1 + self.x_margin)
     h = rect.h if self.y_fill else inner_size[1] + 2 * (1 + self.y_margin)
     return w, h
 
   def disp(self, rect):
-    size = self.size(rect)
+    size = self.cached_size(rect)
 
     rect_w = min(size[0], rect.w)
     rect_h = min(size[1], rect.h)
@@ -339,7 +391,7 @@ class Box(View):
         if self.caption:
           self.caption.display(rect.adj_rect(3, 0))
         if self.underscript:
-          s = self.underscript.size(rect)
+          s = self.underscript.cached_size(rect)
           self.underscript.display(rect.adj_rect(max(3, rect_w - s[0] - 3), rect_h - 1))
       except curses.error, e:
         # We should not have sent this invalid draw command...
@@ -354,6 +406,10 @@ class Box(View):
 #----------------------------------------------------------------------
 #  CONTROL classes
 
+# Bookkeeping attributes, which don't make a control dirty
+_BOOKKEEPING_ATTRS = frozenset(['_dirty', '_cached_view', '_cached_key', '_view_frame', '_control_index'])
+_missing = object()
+
 
 class Control(object):
   """Base class for Controls.
@@ -364,20 +420,80 @@ class Control(object):
   - Put their children in the self.controls member, or override
     the children() method.
   - Override render() to return an instance of View.
+
+  By default render() is called on every frame. Controls whose appearance
+  only depends on their own attributes and their children can set
+  `cache_view = True`, in which case get_view() reuses the last view until the
+  control is marked dirty. Assigning to any attribute does that automatically;
+  such controls must set `self._dirty = True` when they mutate state in place.
   """
+  cache_view = False
+  _dirty = True
+  _cached_view = None
+  _cached_key = None
+  _view_frame = -1
+  _control_index = None
+
   def __init__(self, fg=white, bg=black, id=None):
     self.fg = fg
     self.bg = bg
     self.id = id
     self.can_focus = False
     self.controls = []
+    self._dirty = True
+
+  def __setattr__(self, name, value):
+    if name not in _BOOKKEEPING_ATTRS and self.__dict__.get(name, _missing) is not value:
+      object.__setattr__(self, '_dirty', True)
+    object.__setattr__(self, name, value)
 
   def render(self, app):
     raise RuntimeError('Not implemented: render()')
 
+  def get_view(self, app):
+    """Return the view for this control, rendering it at most once per frame.
+
+    For controls with cache_view set, the previous view is reused if the
+    control isn't dirty, its focus state didn't change and all of its children
+    returned their previous views as well.
+    """
+    if self._view_frame == app._frame_generation:
+      return self._cached_view
+
+    if not self.cache_view:
+      self._cached_view = self.render(app)
+      self._view_frame = app._frame_generation
+      return self._cached_view
+
+    # Views don't define __eq__, so this compares the child views by identity
+    key = (app.contains_focus(self),) + tuple(c.get_view(app) for c in self._view_deps())
+    if self._dirty or key != self._cached_key:
+      self._cached_view = self.render(app)
+      self._cached_key = key
+      self._dirty = False
+    self._view_frame = app._frame_generation
+    return self._cached_view
+
+  def _view_deps(self):
+    """Return the controls whose views are embedded in this control's view."""
+    return self.children()
+
   def children(self):
     return self.controls
 
+  def _index_of(self, ctrl):
+    """Return the position of ctrl in self.controls.
+
+    Uses an id -> index map that is rebuilt whenever it turns out to be out of
+    date, so that changes to self.controls are picked up.
+    """
+    index = self._control_index
+    i = index.get(id(ctrl)) if index is not None else None
+    if i is None or i >= len(self.controls) or self.controls[i] is not ctrl:
+      index = self._control_index = dict((id(c), j) for j, c in enumerate(self.controls))
+      i = index[id(ctrl)]
+    return i
+
   def on_event(self, ev):
     pass
 
@@ -417,6 +533,8 @@ class Control(object):
 
 class Text(Control):
   """Display some text in the UI."""
+  cache_view = True
+
   def __init__(self, value, **kwargs):
     super(Text, self).__init__(**kwargs)
     self.value = value
@@ -430,8 +548,11 @@ class Text(Control):
     return Display(self.value, fg=self.fg, bg=self.bg)
 
 
-def propagate_focus(ev, controls, layer, keys_back, keys_fwd):
-  """Propagate focus events forwards and backwards through a list of controls."""
+def propagate_focus(ev, controls, layer, keys_back, keys_fwd, index_of=None):
+  """Propagate focus events forwards and backwards through a list of controls.
+
+  index_of, if given, is used to find the position of a control in the list.
+  """
   if ev.type == 'key':
     if ev.key in keys_back + keys_fwd:
       back = ev.key in keys_back
@@ -439,7 +560,7 @@ def propagate_focus(ev, controls, layer, keys_back, keys_fwd):
       if not current:
         return False
 
-      i = controls.index(current)
+      i = index_of(current) if index_of else controls.index(current)
       while 0 <= i < len(controls) and ev.propagating:
         i += -1 if back else 1
         if 0 <= i < len(controls) and controls[i].enter_focus(ev.key, ev.app):
@@ -450,6 +571,8 @@ def propagate_focus(ev, controls, layer, keys_back, keys_fwd):
 
 class Panel(Control):
   """Contains other controls vertically, surrounds them with a box."""
+  cache_view = True
+
   def __init__(self, controls, caption=None, underscript=None, **kwargs):
     super(Panel, self).__init__(**kwargs)
     self.controls = controls
@@ -457,29 +580,36 @@ class Panel(Control):
     self.underscript = None
 
   def render(self, app):
-    return Box(Vertical([c.render(app) for c in self.controls]),
-               caption=self.caption.render(app) if self.caption else None,
-               underscript=self.underscript.render(app) if self.underscript else None)
+    return Box(Vertical([c.get_view(app) for c in self.controls]),
+               caption=self.caption.get_view(app) if self.caption else None,
+               underscript=self.underscript.get_view(app) if self.underscript else None)
+
+  def _view_deps(self):
+    return [c for c in [self.caption, self.underscript] if c] + self.controls
 
   def on_event(self, ev):
     propagate_focus(ev, self.controls, ev.app.layer(self),
                     [curses.KEY_UP, SHIFT_TAB],
-                    [curses.KEY_DOWN, curses.ascii.TAB])
+                    [curses.KEY_DOWN, curses.ascii.TAB],
+                    index_of=self._index_of)
 
 
 class Stacked(Control):
   """Just lays out other controls vertically, no decoration."""
+  cache_view = True
+
   def __init__(self, controls, **kwargs):
     super(Stacked, self).__init__(**kwargs)
     self.controls = controls
 
   def render(self, app):
-    return Vertical([c.render(app) for c in self.controls])
+    return Vertical([c.get_view(app) for c in self.controls])
 
   def on_event(self, ev):
     propagate_focus(ev, self.controls, ev.app.layer(self),
                     [curses.KEY_UP, SHIFT_TAB],
-                    [curses.KEY_DOWN, curses.ascii.TAB])
+                    [curses.KEY_DOWN, curses.ascii.TAB],
+                    index_of=self._index_of)
 
 
 class Option(object):
@@ -516,6 +646,8 @@ class Option(object):
 
 class Labeled(Control):
   """Applies an offset to a control, fill it with a text label."""
+  cache_view = True
+
   def __init__(self, label, control, **kwargs):
     super(Labeled, self).__init__(**kwargs)
     assert(control)
@@ -526,7 +658,7 @@ class Labeled(Control):
     fg = white if app.contains_focus(self) else green
     attr = curses.A_BOLD if app.contains_focus(self) else 0
     return Horizontal([Display(self.label, min_width=16, fg=fg, attr=attr),
-                       self.control.render(app)])
+                       self.control.get_view(app)])
 
   def children(self):
     return [self.control]
@@ -549,6 +681,13 @@ class SelectList(Control):
     self.scroll_offset = max(0, min(self.index, len(self.choices) - height))
     self.can_focus = True
     self.show_captions_at = show_captions_at
+    self._make_rows()
+
+  def _make_rows(self):
+    """Make the Displays that are reused for the rows between frames."""
+    self._rows = [Display('', min_width=self.width) for _ in range(self.height)]
+    self._rows_view = Vertical(self._rows)
+    self._populated = None
 
   def adjust(self, d):
     """Scroll by the given delta through the options."""
@@ -584,13 +723,43 @@ class SelectList(Control):
           ])
     return Display(line, min_width=self.width, attr=attr)
 
-  def render(self, app):
-    self.sanitize_index()
+  def _select_row(self, row, selected):
+    if 0 <= row < len(self._rows):
+      self._rows[row].attr = curses.A_STANDOUT if selected else 0
+
+  def _populate(self):
+    """Fill the reused row Displays with the visible choices.
+
+    If the visible choices are the same objects as last time, just move the
+    highlight from the previously selected row to the new one.
+    """
+    if len(self._rows) != self.height or (self._rows and self._rows[0].min_width != self.width):
+      self._make_rows()
 
+    row = self.index - self.scroll_offset
     lines = self.choices[self.scroll_offset:self.scroll_offset + self.height]
-    lines.extend([''] * (self.height - len(lines)))
+    last = self._populated
+    if last and len(last[0]) == len(lines) and all(a is b for a, b in zip(last[0], lines)):
+      if last[1] != row:
+        self._select_row(last[1], False)
+        self._select_row(row, True)
+    else:
+      for i, display in enumerate(self._rows):
+        display.text = lines[i] if i < len(lines) else ''
+        display.attr = curses.A_STANDOUT if i == row else 0
+    self._populated = (lines, row)
 
-    self.last_render = Vertical([self._render_line(l, i + self.scroll_offset == self.index) for i, l in enumerate(lines)])
+  def render(self, app):
+    self.sanitize_index()
+
+    if self.show_captions_at:
+      # Rows may consist of multiple Displays, don't bother reusing them
+      lines = self.choices[self.scroll_offset:self.scroll_offset + self.height]
+      lines.extend([''] * (self.height - len(lines)))
+      self.last_render = Vertical([self._render_line(l, i + self.scroll_offset == self.index) for i, l in enumerate(lines)])
+    else:
+      self._populate()
+      self.last_render = self._rows_view
 
     # FIXME: Scroll bar
     return self.last_render
@@ -602,44 +771,77 @@ class SelectList(Control):
         ev.stop()
 
 
+_month_grid_cache = {}
+_MONTH_GRID_CACHE_SIZE = 32
+
+# The header row is the same for every calendar, so all of them share it. It's
+# built on first use, after the application had the chance to set the locale.
+_weekheader_row = None
+_ONE_DAY = datetime.timedelta(days=1)
+_ONE_WEEK = datetime.timedelta(weeks=1)
+
+
+def _render_month_grid(year, month, highlighted_day, focused):
+  """Return the calendar view of a month, with one of the days highlighted.
+
+  Views are cached and shared between frames and SelectDate controls, so that
+  moving around within a month doesn't rebuild the whole calendar.
+  """
+  key = (year, month, highlighted_day, focused)
+  try:
+    return _month_grid_cache[key]
+  except KeyError:
+    pass
+
+  def render_cell(cell):
+    if not cell:
+      return Display('')
+    attr = 0
+    if cell == highlighted_day:
+      attr = curses.A_STANDOUT if focused else curses.A_UNDERLINE
+    return Display(str(cell), attr=attr)
+
+  global _weekheader_row
+  if _weekheader_row is None:
+    _weekheader_row = [[Display(t, fg=green) for t in calendar.weekheader(3).split()]]
+
+  cal_data = calendar.monthcalendar(year, month)
+
+  assert(len(cal_data[0]) == len(_weekheader_row[0]))
+
+  cells = [[render_cell(cell) for cell in row]
+           for row in cal_data]
+
+  month_name = Display('%s, %s' % (datetime.date(year, month, 1).strftime('%B'), year))
+  grid = Grid(_weekheader_row + cells, align_right=True)
+
+  if len(_month_grid_cache) >= _MONTH_GRID_CACHE_SIZE:
+    _month_grid_cache.clear()
+  view = _month_grid_cache[key] = Vertical([month_name, grid])
+  return view
+
+
 class SelectDate(Control):
   """A Calendar control for selecting a date.
 
   `.value` contains the date as a datetime.datetime.
   `.date` contains the date date as a datetime.date.
   """
+  cache_view = True
+
   def __init__(self, value=None, **kwargs):
-    super(Control, self).__init__(**kwargs)
+    super(SelectDate, self).__init__(**kwargs)
     self.can_focus = True
     self.value = value or datetime.datetime.now()
     self.controls = []
 
-  def _render_monthcell(self, cell):
-    if not cell:
-      return Display('')
-    attr = 0
-    if cell == self.value.day:
-      attr = curses.A_STANDOUT if self.has_focus else curses.A_UNDERLINE
-    return Display(str(cell), attr=attr)
-
   @property
   def date(self):
     return self.value.date()
 
   def render(self, app):
     self.has_focus = app.contains_focus(self)
-    cal_data = calendar.monthcalendar(self.value.year, self.value.month)
-    cal_header = [[Display(t, fg=green) for t in calendar.weekheader(3).split(' ')]]
-
-    assert(len(cal_data[0]) == len(cal_header[0]))
-
-    cells = [[self._render_monthcell(cell) for cell in row]
-             for row in cal_data]
-
-    month_name = Display('%s, %s' % (self.value.strftime('%B'), self.value.year))
-    grid = Grid(cal_header + cells, align_right=True)
-
-    return Vertical([month_name, grid])
+    return _render_month_grid(self.value.year, self.value.month, self.value.day, self.has_focus)
 
   def on_event(self, ev):
     if ev.type == 'key':
@@ -647,36 +849,41 @@ class SelectDate(Control):
         self.value = datetime.datetime.now()
         ev.stop()
       if ev.what == curses.KEY_LEFT:
-        self.value += datetime.timedelta(days=-1)
+        self.value -= _ONE_DAY
         ev.stop()
       if ev.what == curses.KEY_RIGHT:
-        self.value += datetime.timedelta(days=1)
+        self.value += _ONE_DAY
         ev.stop()
       if ev.what == curses.KEY_UP:
-        self.value += datetime.timedelta(weeks=-1)
+        self.value -= _ONE_WEEK
         ev.stop()
       if ev.what == curses.KEY_DOWN:
-        self.value += datetime.timedelta(weeks=1)
+        self.value += _ONE_WEEK
         ev.stop()
 
 
 class Composite(Control):
   """Horizontal composition of other controls."""
+  cache_view = True
+
   def __init__(self, controls, margin=0, **kwargs):
     super(Composite, self).__init__(**kwargs)
     self.controls = controls
     self.margin = margin
 
   def render(self, app):
-    m = Display(' ' * self.margin)
-    xs = [c.render(app) for c in self.controls]
-    rendered = list(itertools.chain(*list(zip(xs, itertools.repeat(m)))))
+    rendered = []
+    for c in self.controls:
+      if rendered and self.margin:
+        rendered.append(Display(' ' * self.margin))
+      rendered.append(c.get_view(app))
     return Horizontal(rendered)
 
   def on_event(self, ev):
     propagate_focus(ev, self.controls, ev.app.layer(self),
                     [curses.KEY_LEFT, SHIFT_TAB],
-                    [curses.KEY_RIGHT, curses.ascii.TAB])
+                    [curses.KEY_RIGHT, curses.ascii.TAB],
+                    index_of=self._index_of)
 
   def _focus_order(self, key):
     """If we enter the control from the bottom, still focus the first element."""
@@ -694,6 +901,8 @@ class Popup(Control):
   keypress escapes the focused control, but on_close will
   only be called if ENTER was used to remove the popup.
   """
+  cache_view = True
+
   def __init__(self, inner, on_close, x=-1, y=-1, caption='', underscript='', **kwargs):
     super(Popup, self).__init__(**kwargs)
     self.x = x
@@ -704,7 +913,7 @@ class Popup(Control):
     self.underscript = underscript
 
   def render(self, app):
-    inner = Box(self.inner.render(app),
+    inner = Box(self.inner.get_view(app),
                 x_fill=False,
                 caption=Display(self.caption),
                 underscript=Display(self.underscript))
@@ -790,6 +999,8 @@ class Combo(Control):
 
 
 class Toasty(Control):
+  cache_view = True
+
   def __init__(self, text, duration=datetime.timedelta(seconds=3), border=True, **kwargs):
     super(Toasty, self).__init__(**kwargs)
     self.text = text
@@ -812,6 +1023,8 @@ class Toasty(Control):
 
 class DateCombo(Control):
   """A SelectDate in a popup."""
+  cache_view = True
+
   def __init__(self, value=None, **kwargs):
     super(DateCombo, self).__init__(**kwargs)
     self.value = value or datetime.datetime.now()
@@ -872,37 +1085,55 @@ class Edit(Control):
       should return a list of curses (color, attributes), one for every
       character.
   """
+  cache_view = True
+
   def __init__(self, value, min_size=0, highlight=None, **kwargs):
     super(Edit, self).__init__(**kwargs)
-    self._value = value
+    # Gap buffer: the characters before the cursor, and the characters after
+    # the cursor in reverse order, so that editing at the cursor is O(1).
+    self._left = list(value)
+    self._right = []
     self.min_size = min_size
     self.can_focus = True
-    self.cursor = len(value)
     self.highlight = highlight
 
   @property
   def value(self):
-    return self._value
+    return ''.join(self._left) + ''.join(reversed(self._right))
 
   @value.setter
   def value(self, value):
-    self._value = value
-    self.cursor = len(value)
+    self._left = list(value)
+    self._right = []
+
+  @property
+  def cursor(self):
+    return len(self._left)
+
+  @cursor.setter
+  def cursor(self, cursor):
+    cursor = max(0, min(cursor, len(self._left) + len(self._right)))
+    while len(self._left) > cursor:
+      self._right.append(self._left.pop())
+    while len(self._left) < cursor:
+      self._left.append(self._right.pop())
+    self._dirty = True
 
   def render(self, app):
     focused = app.contains_focus(self)
+    value = self.value
 
     # Default highlighting, foreground color
-    colorized = self.value
+    colorized = value
     if self.highlight:
       # Custom highlighting
       try:
-        colorized = self.highlight(self.value)
+        colorized = self.highlight(value)
       except Exception, e:
         logger.error(str(e))
 
     # Make the field longer for the cursor or display purposes
-    ext_len = max(0, max(self.cursor + 1 if focused else 0, self.min_size) - len(self.value))
+    ext_len = max(0, max(self.cursor + 1 if focused else 0, self.min_size) - len(value))
     colorized += ' ' * ext_len
 
     # Render that momma
@@ -950,30 +1181,32 @@ class Edit(Control):
         self.cursor = 0
         ev.stop()
       if ev.key in [CTRL_E, curses.KEY_END]:
-        self.cursor = len(self._value)
+        self.cursor = len(self._left) + len(self._right)
         ev.stop()
       if ev.key in [curses.KEY_BACKSPACE, MAC_BACKSPACE]:
-        if self.cursor > 0:
-          self._value = self._value[:self.cursor-1] + self._value[self.cursor:]
-          self.cursor = max(0, self.cursor - 1)
+        if self._left:
+          self._left.pop()
+          self._dirty = True
         ev.stop()
       elif ev.key in [curses.ascii.DEL, OTHER_DEL]:
-        if self.cursor < len(self._value) - 1:
-          self._value = self._value[:self.cursor] + self._value[self.cursor+1:]
+        if self._right:
+          self._right.pop()
+          self._dirty = True
         ev.stop()
-      if ev.key == curses.KEY_LEFT and self.cursor > 0:
-        self.cursor -= 1
+      if ev.key == curses.KEY_LEFT and self._left:
+        self._right.append(self._left.pop())
+        self._dirty = True
         ev.stop()
-      if ev.key == curses.KEY_RIGHT and self.cursor < len(self._value):
-        self.cursor += 1
+      if ev.key == curses.KEY_RIGHT and self._right:
+        self._left.append(self._right.pop())
+        self._dirty = True
         ev.stop()
       if ev.key == CTRL_U:
         self.value = ''
-        self.cursor = 0
         ev.stop()
       if 32 <= ev.key < 127:
-        self._value = self._value[:self.cursor] + chr(ev.key) + self._value[self.cursor:]
-        self.cursor += 1
+        self._left.append(chr(ev.key))
+        self._dirty = True
         ev.stop()
 
 
@@ -1013,18 +1246,20 @@ class AutoCompleteEdit(Edit):
 
     Returns (offset, string).
     """
-    i = min(self.cursor, len(self.value) - 1)  # Inclusive
-    while (i > 0 and self.value[i] in self.letters and
-           self.value[i-1] in self.letters):
+    value = self.value
+    i = min(self.cursor, len(value) - 1)  # Inclusive
+    while (i > 0 and value[i] in self.letters and
+           value[i-1] in self.letters):
       i -= 1
     j = i + 1  # Exclusive
-    while (j < len(self.value) and self.value[j] in self.letters):
+    while (j < len(value) and value[j] in self.letters):
       j += 1
-    return (i, self.value[i:j])
+    return (i, value[i:j])
 
   def replace_cursor_word(self, word):
     i, current = self.cursor_word
-    self.value = self.value[:i] + word + self.value[i+len(current):]
+    value = self.value
+    self.value = value[:i] + word + value[i+len(current):]
 
   def on_event(self, ev):
     super(AutoCompleteEdit, self).on_event(ev)
@@ -1056,6 +1291,8 @@ class AutoCompleteEdit(Edit):
 
 class Button(Control):
   """Button which calls an event handler if hit."""
+  cache_view = True
+
   def __init__(self, caption, on_click=None, fg=yellow, **kwargs):
     super(Button, self).__init__(fg=fg, **kwargs)
     self.caption = caption
@@ -1075,6 +1312,8 @@ class Button(Control):
 
 
 class PreviewPane(Control):
+  cache_view = True
+
   def __init__(self, text, row_selectable=False, on_select_row=None, **kwargs):
     super(PreviewPane, self).__init__(**kwargs)
     self._text = text
@@ -1181,6 +1420,8 @@ class PreviewPane(Control):
 
 class SwitchableControl(Control):
     """A control that can change the control it's displaying."""
+    cache_view = True
+
     def __init__(self, initial_control, **kwargs):
       super(SwitchableControl, self).__init__(**kwargs)
       self.controls.append(initial_control)
@@ -1189,11 +1430,13 @@ class SwitchableControl(Control):
       # Keep focus if we had focus before, but don't steal it otherwise
       had_focus = app.contains_focus(self)
       self.controls[:] = [control]
+      self._dirty = True
+      app._invalidate_tree()
       if had_focus:
         control.enter_focus('', app)
 
     def render(self, app):
-      return self.controls[0].render(app)
+      return self.controls[0].get_view(app)
 
 
 #----------------------------------------------------------------------
@@ -1221,10 +1464,30 @@ class Rect(object):
   def resize(self, w, h):
     return self.sub_rect(0, 0, w, h)
 
+  def as_tuple(self):
+    return (self.x, self.y, self.w, self.h)
+
   def clear(self):
-    line = ' ' * self.w
+    # Text queued for this area would end up on top of whatever gets drawn next
     for j in range(self.y, self.y + self.h):
-      self.screen.addstr(j, self.x, line)
+      self.app.discard_text(j, self.x, self.w)
+
+    screen_h, screen_w = self.screen.getmaxyx()
+    if self.app._erased_this_frame and self.x + self.w <= screen_w and self.y + self.h <= screen_h:
+      # Still drawing the first layer onto the erased screen. Boxes may already
+      # have drawn their borders, but views within a layer don't overlap, so
+      # this area is still blank.
+      return
+
+    if self.x + self.w >= screen_w:
+      # Clearing to the end of the line can't wrap the cursor off the screen
+      for j in range(self.y, self.y + self.h):
+        self.screen.move(j, self.x)
+        self.screen.clrtoeol()
+    else:
+      line = ' ' * self.w
+      for j in range(self.y, self.y + self.h):
+        self.screen.addstr(j, self.x, line)
 
   def __repr__(self):
     return '(%s,%s,%s,%s)' % (self.x, self.y, self.w, self.h)
@@ -1250,7 +1513,8 @@ def object_tree(root):
     parent, obj = stack.pop()
     yield parent, obj
     children = obj.children()
-    stack.extend((obj, c) for c in reversed(children))
+    for i in range(len(children) - 1, -1, -1):
+      stack.append((obj, children[i]))
 
 
 class Layer(Control):
@@ -1259,6 +1523,8 @@ class Layer(Control):
   Non-modal layers stack, but can't be interacted with. The topmost modal layer
   will be the one receiving input.
   """
+  cache_view = True
+
 
   def __init__(self, root, app, modal, id):
     super(Layer, self).__init__()
@@ -1270,31 +1536,35 @@ class Layer(Control):
 
     self._focus_first()
 
+  def _focusable_controls(self):
+    """Return the controls in this layer that can take focus, in tree order."""
+    if self in self.app.layers:
+      return self.app._layer_focusables(self)
+    # Not pushed onto the app yet
+    return [child for parent, child in object_tree(self) if child.can_focus]
+
   def _focus_first(self):
-    for parent, child in object_tree(self):
-      if child.can_focus:
-        self.focus(child)
-        return
+    controls = self._focusable_controls()
+    if controls:
+      self.focus(controls[0])
 
   def _focus_last(self):
-    controls = list(object_tree(self))
-    controls.reverse()
-    for parent, child in controls:
-      if child.can_focus:
-        self.focus(child)
-        return
+    controls = self._focusable_controls()
+    if controls:
+      self.focus(controls[-1])
 
   def focus(self, ctrl):
     assert(ctrl.can_focus)
     self.focused.on_event(Event('blur', None, self.focused, self.app))
     self.focused = ctrl
+    self.app._focus_chain = None
     self.focused.on_event(Event('focus', None, self.focused, self.app))
 
   def children(self):
     return [self.root]
 
   def render(self, app):
-    return self.root.render(app)
+    return self.root.get_view(app)
 
 
 class TimerHandle(object):
@@ -1318,17 +1588,34 @@ class LayerHandle(object):
     for i, layer in enumerate(self.app.layers):
       if layer.id == self.layer_id:
         self.app.layers.pop(i)
+        self.app._invalidate_tree()
         break
 
 
+# Frame numbers are shared by all Apps, because controls and views can outlive
+# an App (e.g. when a root is shown with walk() again) and keep their stamps.
+_frame_numbers = itertools.count(1)
+
+
 class App(Control):
   def __init__(self, root):
     super(App, self).__init__()
     self.exit = False
     self.screen = None
     self.layers = []
-    self.color_cache = {}
+    self._color_table = [0] * 256  # Pair numbers for 16x16 colors, by (fg << 4) | bg
+    self.color_cache = {}  # Pair numbers for colors outside of the table
     self.color_counter = 1
+    self._size_cache = {}
+    self._frame_generation = next(_frame_numbers)
+    self._tree_snapshot = None
+    self._parent_map = None
+    self._focusables = None
+    self._id_index = None
+    self._focus_chain = None
+    self._row_spans = {}
+    self._erased_this_frame = False
+    self._tree_version = 0
     self.timers = []
     self.uniq_id = 0
 
@@ -1353,22 +1640,86 @@ class App(Control):
     assert(isinstance(control, Control))
     self.uniq_id += 1
     self.layers.append(Layer(control, self, modal, self.uniq_id))
+    self._invalidate_tree()
     return LayerHandle(self, self.uniq_id)
 
+  def _invalidate_tree(self):
+    """Forget the cached control tree after controls were added or removed."""
+    self._tree_version += 1
+    self._tree_snapshot = None
+    self._parent_map = None
+    self._focusables = None
+    self._id_index = None
+    self._focus_chain = None
+
   def _all_objects(self):
-    return object_tree(self)
+    """Return the (parent, child) pairs of the whole tree, in depth-first order."""
+    if self._tree_snapshot is None:
+      self._tree_snapshot = list(object_tree(self))
+    return self._tree_snapshot
+
+  def _snapshot_lookup(self, cache_attr, key, build, valid=None, default=None):
+    """Look up key in one of the indexes that are built from the tree snapshot.
+
+    Controls can be added to or removed from the tree in place (e.g. by
+    changing a controls list in an event handler) without the app hearing
+    about it. Instead of tracking those changes, lookups check themselves: on a
+    miss, or if valid(value) says a hit no longer matches the live tree, the
+    snapshot is rebuilt once before looking again.
+    """
+    index = getattr(self, cache_attr)
+    if index is not None:
+      if key in index and (valid is None or valid(index[key])):
+        return index[key]
+      self._invalidate_tree()
+    index = build()
+    setattr(self, cache_attr, index)
+    return index.get(key, default)
+
+  def _build_focusables(self):
+    # Layers are our direct children, so in the depth-first snapshot every
+    # layer is followed by the rest of its subtree.
+    index = {}
+    focusables = None
+    for parent, child in self._all_objects():
+      if parent is self:
+        focusables = index[id(child)] = []
+      elif focusables is not None and child.can_focus:
+        focusables.append(child)
+    return index
+
+  def _layer_focusables(self, layer):
+    """Return the focusable controls of the given layer, in tree order."""
+    def valid(controls):
+      # Controls added to the layer in place are only picked up by the next
+      # frame's snapshot, but removed ones must not get focus.
+      return all(self.layer(c) is layer for c in controls)
+    return self._snapshot_lookup('_focusables', id(layer), self._build_focusables,
+                                 valid, default=[])
 
   def children(self):
     return self.layers
 
+  def _build_parent_map(self):
+    return dict((id(child), parent) for parent, child in self._all_objects())
+
   def get_parent(self, ctrl):
-    for parent, child in self._all_objects():
-      if child is ctrl:
-        return parent
-    return None
+    def valid(parent):
+      # Only the app itself has no parent
+      return parent is None or ctrl in parent.children()
+    return self._snapshot_lookup('_parent_map', id(ctrl), self._build_parent_map, valid)
 
   def contains_focus(self, ctrl):
-    return self.find_ancestor(self.active_layer.focused, [ctrl]) is not None
+    if self._focus_chain is None:
+      # The focused control and all of its ancestors. get_parent() may rebuild
+      # the tree and drop the chain, so it's only stored once it's complete.
+      chain = set()
+      focused = self.active_layer.focused
+      while focused:
+        chain.add(id(focused))
+        focused = self.get_parent(focused)
+      self._focus_chain = chain
+    return id(ctrl) in self._focus_chain
 
   def find_ancestor(self, ctrl, set):
     """Find parent from a set of parents."""
@@ -1381,13 +1732,73 @@ class App(Control):
     return self.find_ancestor(ctrl, self.layers)
 
   def get_color(self, fore, back):
+    if 0 <= fore < 16 and 0 <= back < 16:
+      k = (fore << 4) | back
+      pair = self._color_table[k]
+      if not pair:
+        pair = self._color_table[k] = self._init_pair(fore, back)
+      return pair
+
     tup = (fore, back)
     if tup not in self.color_cache:
-      curses.init_pair(self.color_counter, fore, back)
-      self.color_cache[tup] = self.color_counter
-      self.color_counter += 1
+      self.color_cache[tup] = self._init_pair(fore, back)
     return self.color_cache[tup]
 
+  def _init_pair(self, fore, back):
+    pair = self.color_counter
+    curses.init_pair(pair, fore, back)
+    self.color_counter += 1
+    return pair
+
+  def _init_colors(self):
+    """Allocate the color pairs for all named colors before the first frame.
+
+    Controls only ever use them on a black background.
+    """
+    for fg in [black, red, green, white, blue, cyan, magenta, yellow]:
+      self.get_color(fg, black)
+
+  def queue_text(self, y, x, text, attr):
+    """Queue text to be written to the screen after the current layer is drawn.
+
+    Text that continues a run with the same attributes on the same row is
+    merged into it, so that every run costs a single addstr() call.
+    """
+    spans = self._row_spans.setdefault(y, [])
+    if spans:
+      last = spans[-1]
+      if last[0] + len(last[1]) == x and last[2] == attr:
+        last[1] += text
+        return
+    spans.append([x, text, attr])
+
+  def discard_text(self, y, x, w):
+    """Drop queued text in the given part of a row, because it's being overwritten."""
+    spans = self._row_spans.get(y)
+    if not spans:
+      return
+    kept = []
+    for sx, text, attr in spans:
+      ex = sx + len(text)
+      if ex <= x or sx >= x + w:
+        kept.append([sx, text, attr])
+        continue
+      if sx < x:
+        kept.append([sx, text[:x - sx], attr])
+      if ex > x + w:
+        kept.append([x + w, text[x + w - sx:], attr])
+    self._row_spans[y] = kept
+
+  def _flush_text(self):
+    """Write all queued text to the screen, in the order it was queued."""
+    for y, spans in self._row_spans.iteritems():
+      for x, text, attr in spans:
+        try:
+          self.screen.addstr(y, x, text, attr)
+        except curses.error, e:
+          logger.warn(str(e))
+    self._row_spans.clear()
+
   @property
   def ch_wait_time(self):
     if self.timers:
@@ -1405,6 +1816,7 @@ class App(Control):
   def run(self, screen):
     curses.nonl()  # We need Ctrl-J!
     curses.curs_set(0)
+    self._init_colors()
     self.screen = screen
     while not self.exit:
       self.update()
@@ -1412,20 +1824,53 @@ class App(Control):
       try:
         c = self.screen.getch()
         if c != -1:
+          version = self._tree_version
           self.dispatch_event(Event('key', c, self.active_layer.focused, self))
+          if self._tree_version == version:
+            self._drain_keys()
       except KeyboardInterrupt:
         # Just another kind of event
         self.dispatch_event(Event('break', None, self.active_layer.focused, self))
       self.fire_timers()
 
+  def _drain_keys(self):
+    """Handle keys that are already waiting without redrawing in between.
+
+    This way a paste or a burst of repeated keys only costs a single redraw.
+    Stops early when an event changes the control tree (e.g. opens a popup),
+    because the new controls have to be rendered before they get input.
+    """
+    self.screen.nodelay(True)
+    try:
+      while not self.exit:
+        version = self._tree_version
+        c = self.screen.getch()
+        if c == -1:
+          break
+        self.dispatch_event(Event('key', c, self.active_layer.focused, self))
+        if self._tree_version != version:
+          break
+    finally:
+      self.screen.nodelay(False)
+
   def update(self):
     h, w = self.screen.getmaxyx()
+    self._size_cache.clear()
+    self._row_spans.clear()
+    self._frame_generation = next(_frame_numbers)
+    self._invalidate_tree()
 
     self.screen.erase()
+    self._erased_this_frame = True
     for layer in self.layers:
-      view = layer.render(self)
+      view = layer.get_view(self)
       view.display(Rect(self, self.screen, 0, 0, w, h))
-    self.screen.refresh()
+      # Write this layer's text before the next layer draws over it
+      self._flush_text()
+      # Later layers are drawn over this one, so they do need to clear
+      self._erased_this_frame = False
+    self.screen.noutrefresh()
+    curses.doupdate()
 
   def dispatch_event(self, ev):
     tgt = ev.target
@@ -1450,11 +1895,20 @@ class App(Control):
       if ev.key in [curses.KEY_UP, SHIFT_TAB]:
         self.active_layer._focus_last()
 
+  def _build_id_index(self):
+    index = {}
+    for parent, child in self._all_objects():
+      if child.id is not None:
+        # Like a tree walk, the first control with an id wins
+        index.setdefault(child.id, child)
+    return index
+
   def find(self, id):
-    for parent, child in object_tree(self):
-      if child.id == id:
-        return child
-    raise RuntimeError('No such control: %s' % id)
+    ctrl = self._snapshot_lookup('_id_index', id, self._build_id_index,
+                                 lambda ctrl: self.layer(ctrl) is not None)
+    if ctrl is None:
+      raise RuntimeError('No such control: %s' % id)
+    return ctrl
 
 
 def get_all(root, ids):